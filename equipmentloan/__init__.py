@@ -1,4 +1,22 @@
 # -*- coding: utf-8 -*-
 
+import importlib
+
 PLUGIN_VERSION = "0.1.0"
 default_app_config = "equipmentloan.apps.EquipmentLoanConfig"
+
+# Submodules which are only imported on first access (PEP 562),
+# so reading PLUGIN_VERSION does not load DRF, models or views
+_LAZY_SUBMODULES = (
+    "permissions",
+    "permissions_drf",
+    "serializers",
+    "urls",
+    "views",
+)
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,5 +16,5 @@ class EquipmentLoanConfig(AppConfig):
 
     def ready(self):
         """Initialize the app when Django is ready."""
-        # Import signals or perform other initialization here if needed
-        pass
+        # Connect the settings cache invalidation signals
+        from . import cache  # noqa: F401
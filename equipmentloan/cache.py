@@ -0,0 +1,155 @@
+"""
+Caching helpers for the EquipmentLoan plugin.
+Avoids re-reading plugin settings and recomputing API summaries on every request.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+SETTING_CACHE_TIMEOUT = 60
+SETTINGS_DICT_CACHE_KEY = "equipmentloan:settings_dict"
+SETTINGS_DICT_CACHE_TIMEOUT = 30
+LOAN_GENERATION_CACHE_KEY = "equipmentloan:loan_generation"
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def setting_cache_key(key):
+    """Return the cache key used for a plugin setting"""
+    return f"equipmentloan:setting:{key}"
+
+
+def get_cached_setting(plugin, key):
+    """
+    Get a plugin setting, served from the Django cache where possible.
+
+    Args:
+        plugin: The EquipmentLoan plugin instance
+        key: Name of the setting
+
+    Returns:
+        The setting value
+    """
+    return cache.get_or_set(
+        setting_cache_key(key),
+        lambda: plugin.get_setting(key),
+        timeout=SETTING_CACHE_TIMEOUT,
+    )
+
+
+def get_cached_settings(plugin, keys):
+    """
+    Get several plugin settings with a single cache round trip.
+
+    Settings missing from the cache are read from the plugin and stored together.
+
+    Args:
+        plugin: The EquipmentLoan plugin instance
+        keys: Names of the settings
+
+    Returns:
+        dict: Setting values keyed by setting name, in the order given
+    """
+    cache_keys = {setting_cache_key(key): key for key in keys}
+    cached = cache.get_many(cache_keys)
+
+    missing = {
+        cache_key: plugin.get_setting(key)
+        for cache_key, key in cache_keys.items()
+        if cache_key not in cached
+    }
+    if missing:
+        cache.set_many(missing, timeout=SETTING_CACHE_TIMEOUT)
+        cached.update(missing)
+
+    return {key: cached[cache_key] for cache_key, key in cache_keys.items()}
+
+
+def get_cached_settings_dict(plugin):
+    """
+    Get all plugin settings as a dict, served from the Django cache where possible.
+
+    Args:
+        plugin: The EquipmentLoan plugin instance
+
+    Returns:
+        dict: Setting values keyed by setting name
+    """
+    return cache.get_or_set(
+        SETTINGS_DICT_CACHE_KEY,
+        plugin.get_settings_dict,
+        timeout=SETTINGS_DICT_CACHE_TIMEOUT,
+    )
+
+
+@receiver(post_save, sender="plugin.PluginSetting")
+@receiver(post_delete, sender="plugin.PluginSetting")
+def invalidate_setting_cache(sender, instance, **kwargs):
+    """
+    Drop the cached values when a plugin setting is changed.
+
+    Deferred until the transaction commits, like invalidate_loan_cache, so a
+    concurrent read cannot re-cache the old value in between.
+    """
+    keys = [setting_cache_key(instance.key), SETTINGS_DICT_CACHE_KEY]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_loan_generation():
+    """
+    Get the token identifying the current state of the loans table.
+
+    It is part of every cached_json() key, so replacing it (see
+    invalidate_loan_cache) orphans all cached loan responses at once.
+    """
+    return cache.get_or_set(LOAN_GENERATION_CACHE_KEY, time.time_ns, timeout=None)
+
+
+def invalidate_loan_cache():
+    """
+    Invalidate all cached responses derived from loan data.
+
+    Deferred until the current transaction commits, so a concurrent request
+    cannot cache data from before the change under the new generation.
+    """
+    transaction.on_commit(
+        lambda: cache.set(LOAN_GENERATION_CACHE_KEY, time.time_ns(), timeout=None)
+    )
+
+
+def cached_json(prefix, request, compute, ttl=60):
+    """
+    Return JSON-serializable data for a request, computing it on a cache miss.
+
+    The cache key covers the user, the query parameters and the loan
+    generation, so responses are never shared between users and are dropped
+    whenever a loan changes.
+
+    Args:
+        prefix: Name of the cached endpoint
+        request: The incoming request
+        compute: Callable returning the response data
+        ttl: Cache timeout in seconds
+
+    Returns:
+        The (possibly cached) response data
+    """
+    query = urlencode(sorted(request.query_params.items()))
+    query_hash = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    key = (
+        f"equipmentloan:{prefix}:{get_loan_generation()}:{request.user.pk}:{query_hash}"
+    )
+
+    return cache.get_or_set(key, compute, timeout=ttl)
+
+
+@receiver(post_save, sender="equipmentloan.EquipmentLoan")
+@receiver(post_delete, sender="equipmentloan.EquipmentLoan")
+def invalidate_loan_cache_on_change(sender, instance, **kwargs):
+    """Drop cached loan responses when a loan is saved or deleted"""
+    invalidate_loan_cache()
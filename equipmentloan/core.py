@@ -1,10 +1,28 @@
 """Adds functionality to loan out equipment"""
 
-from equipmentloan import urls
+from functools import cached_property
+
 from plugin import InvenTreePlugin
 from plugin.mixins import SettingsMixin, UserInterfaceMixin, UrlsMixin
 
 from . import PLUGIN_VERSION
+from .cache import get_cached_settings_dict
+
+# Shared empty result for UI hooks with nothing to render
+NO_UI_ITEMS = ()
+
+# Top navigation entries; these are static so they are only built once
+NAVIGATION_ITEMS = (
+    {
+        "key": "equipmentloan-management",
+        "title": "Equipment Loans",
+        "icon": "ti:package:outline",
+        # Use a URL option so the top-navigation will open our plugin page
+        "options": {
+            "url": "/plugins/equipmentloan/page/",
+        },
+    },
+)
 
 
 class EquipmentLoan(SettingsMixin, UserInterfaceMixin, UrlsMixin, InvenTreePlugin):
@@ -66,23 +84,36 @@ class EquipmentLoan(SettingsMixin, UserInterfaceMixin, UrlsMixin, InvenTreePlugi
     def get_ui_panels(self, request, context: dict, **kwargs):
         """Return a list of custom panels to be rendered in the InvenTree user interface."""
 
-        panels = []
+        # Only display these panels for the 'part' target
+        if context.get("target_model") != "part":
+            return NO_UI_ITEMS
+
+        settings = get_cached_settings_dict(self)
+
+        return [
+            {
+                **panel,
+                # Provide additional context data to the panel
+                "context": {
+                    "settings": settings,
+                    "foo": "bar",
+                },
+            }
+            for panel in self._part_panels
+        ]
 
-        # Only display this panel for the 'part' target
-        if context.get("target_model") == "part":
-            panels.append({
+    @cached_property
+    def _part_panels(self):
+        """Static parts of the 'part' panels; only the context varies per request"""
+        return (
+            {
                 "key": "equipmentloan-panel",
                 "title": "EquipmentLoan",
                 "description": "Custom panel description",
                 "icon": "ti:mood-smile:outline",
                 "source": self.plugin_static_file("Panel.js:renderEquipmentLoanPanel"),
-                "context": {
-                    # Provide additional context data to the panel
-                    "settings": self.get_settings_dict(),
-                    "foo": "bar",
-                },
-            })
-            panels.append({
+            },
+            {
                 "key": "equipmentloan-panel2",
                 "title": "EquipmentLoan 2",
                 "description": "Custom panel description",
@@ -90,55 +121,46 @@ class EquipmentLoan(SettingsMixin, UserInterfaceMixin, UrlsMixin, InvenTreePlugi
                 "source": self.plugin_static_file(
                     "Panel2.js:renderEquipmentLoanPanel2"
                 ),
-                "context": {
-                    # Provide additional context data to the panel
-                    "settings": self.get_settings_dict(),
-                    "foo": "bar",
-                },
-            })
-
-        return panels
+            },
+        )
 
     # Custom dashboard items
     def get_ui_dashboard_items(self, request, context: dict, **kwargs):
         """Return a list of custom dashboard items to be rendered in the InvenTree user interface."""
 
-        items = []
-
         # Equipment Loan Management - accessible to all users
-        items.append({
-            "key": "equipmentloan-management",
-            "title": "Equipment Loans",
-            "description": "Manage equipment loans and track borrowing",
-            "icon": "ti:package:outline",
-            "source": self.plugin_static_file(
-                "LoanManagement.js:renderEquipmentLoanManagement"
-            ),
-            "context": {
-                "settings": self.get_settings_dict(),
-            },
-        })
-
-        return items
-
-    # Custom navigation items (top navigation)
-    def get_ui_navigation_items(self, request, context, **kwargs):
-        """Return a list of custom navigation items for the top navigation.
-
-        Uses the UserInterfaceMixin contract (as in SampleUI) to register a
-        navigation entry which will render the plugin component.
-        """
         return [
             {
                 "key": "equipmentloan-management",
                 "title": "Equipment Loans",
+                "description": "Manage equipment loans and track borrowing",
                 "icon": "ti:package:outline",
-                # Use a URL option so the top-navigation will open our plugin page
-                "options": {
-                    "url": "/plugins/equipmentloan/page/",
+                "source": self._management_source,
+                "context": {
+                    "settings": get_cached_settings_dict(self),
                 },
             }
         ]
 
+    # Custom navigation items (top navigation)
+    def get_ui_navigation_items(self, request, context, **kwargs):
+        """Return a list of custom navigation items for the top navigation.
+
+        Uses the UserInterfaceMixin contract (as in SampleUI) to register a
+        navigation entry which will render the plugin component.
+        """
+        # Shallow copies, in case the caller annotates the returned items
+        return [dict(item) for item in NAVIGATION_ITEMS]
+
+    @cached_property
+    def _management_source(self):
+        """Static file reference for the loan management component"""
+        return self.plugin_static_file(
+            "LoanManagement.js:renderEquipmentLoanManagement"
+        )
+
     def setup_urls(self):
-        return urls.urlpatterns
+        # Deferred so plugin discovery does not import the views and serializers
+        from equipmentloan import urls
+
+        return urls.get_urlpatterns()
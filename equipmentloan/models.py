@@ -3,11 +3,28 @@ Models for the EquipmentLoan plugin.
 Tracks the borrowing and return of equipment/parts.
 """
 
+from typing import ClassVar
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import User
+from django.db.models.functions import Now
 from django.utils import timezone
 
+from .cache import invalidate_loan_cache
+
+
+class EquipmentLoanQuerySet(models.QuerySet):
+    """Common filters for EquipmentLoan querysets"""
+
+    # Active loans past their due date, compared against the database clock.
+    # The status condition lets the planner use equipmentloan_active_due_idx.
+    OVERDUE = models.Q(status="active", date_due__isnull=False, date_due__lt=Now())
+
+    def overdue(self):
+        """Return the loans which are overdue"""
+        return self.filter(self.OVERDUE)
+
 
 class EquipmentLoan(models.Model):
     """
@@ -29,6 +46,9 @@ class EquipmentLoan(models.Model):
         ("lost", _("Lost")),
     ]
 
+    # Display labels by status value, so callers don't scan the choices list
+    STATUS_DISPLAY: ClassVar[dict] = dict(LOAN_STATUS_CHOICES)
+
     # Primary fields
     borrower = models.ForeignKey(
         User,
@@ -50,7 +70,9 @@ class EquipmentLoan(models.Model):
 
     # Loan duration fields
     date_borrowed = models.DateTimeField(
-        auto_now_add=True, help_text=_("When the equipment was borrowed")
+        default=timezone.now,
+        editable=False,
+        help_text=_("When the equipment was borrowed"),
     )
 
     date_due = models.DateTimeField(
@@ -85,10 +107,13 @@ class EquipmentLoan(models.Model):
         help_text=_("User who recorded the loan"),
     )
 
-    date_created = models.DateTimeField(auto_now_add=True)
+    date_created = models.DateTimeField(default=timezone.now, editable=False)
 
+    # auto_now keeps serializer and admin saves stamped; bulk paths set it explicitly
     date_updated = models.DateTimeField(auto_now=True)
 
+    objects = EquipmentLoanQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date_borrowed"]
         verbose_name = _("Equipment Loan")
@@ -98,42 +123,74 @@ class EquipmentLoan(models.Model):
             models.Index(fields=["borrower", "status"]),
             models.Index(fields=["part_id", "status"]),
             models.Index(fields=["date_borrowed"]),
+            # Per-borrower listing, in the default (newest first) order
+            models.Index(
+                fields=["borrower", "-date_borrowed"],
+                name="equipmentloan_user_recent_idx",
+            ),
+            # Partial indexes covering only outstanding loans, for overdue queries
+            models.Index(
+                fields=["date_due"],
+                condition=models.Q(status="active"),
+                name="equipmentloan_active_due_idx",
+            ),
+            models.Index(
+                fields=["date_returned"],
+                condition=models.Q(date_returned__isnull=True),
+                name="equipmentloan_outstanding_idx",
+            ),
         ]
 
     def __str__(self):
         return f"{self.part_name} borrowed by {self.borrower.username} on {self.date_borrowed.strftime('%Y-%m-%d')}"
 
-    def is_overdue(self):
-        """Check if the loan is overdue"""
+    def is_overdue(self, now=None):
+        """Check if the loan is overdue, optionally relative to a given time"""
         if self.date_returned or self.status == "returned":
             return False
-        if self.date_due and timezone.now() > self.date_due:
+        if self.date_due and (now or timezone.now()) > self.date_due:
             return True
         return False
 
+    def _update_fields(self, **values):
+        """
+        Write only the given fields, and keep this instance in sync.
+
+        Issues a single-row UPDATE instead of save(), so unchanged columns
+        (such as the notes) are not written back. Signals are not sent, so
+        cached loan responses are invalidated explicitly.
+        """
+        values["date_updated"] = timezone.now()
+        EquipmentLoan.objects.filter(pk=self.pk).update(**values)
+        invalidate_loan_cache()
+
+        for field, value in values.items():
+            setattr(self, field, value)
+
     def mark_returned(self, return_notes=""):
         """Mark the equipment as returned"""
-        self.date_returned = timezone.now()
-        self.status = "returned"
-        self.return_notes = return_notes
-        self.save()
+        self._update_fields(
+            date_returned=timezone.now(),
+            status="returned",
+            return_notes=return_notes,
+        )
 
     def mark_lost(self):
         """Mark the equipment as lost"""
-        self.status = "lost"
-        self.save()
+        self._update_fields(status="lost")
 
-    def get_days_borrowed(self):
+    def get_days_borrowed(self, now=None):
         """Calculate number of days equipment has been borrowed"""
-        end_date = self.date_returned or timezone.now()
+        end_date = self.date_returned or now or timezone.now()
         delta = end_date - self.date_borrowed
         return delta.days
 
-    def get_days_overdue(self):
+    def get_days_overdue(self, now=None):
         """Calculate number of days overdue (if applicable)"""
-        if not self.is_overdue():
+        now = now or timezone.now()
+        if not self.is_overdue(now=now):
             return 0
-        delta = timezone.now() - self.date_due
+        delta = now - self.date_due
         return delta.days
 
 
@@ -152,6 +209,8 @@ class LoanHistory(models.Model):
         ("notes_updated", _("Notes Updated")),
     ]
 
+    EVENT_TYPE_DISPLAY: ClassVar[dict] = dict(EVENT_TYPES)
+
     loan = models.ForeignKey(
         EquipmentLoan, on_delete=models.CASCADE, related_name="history"
     )
@@ -170,7 +229,7 @@ class LoanHistory(models.Model):
         help_text=_("User who triggered this event"),
     )
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = _("Loan History")
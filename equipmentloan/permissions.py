@@ -1,33 +1,90 @@
 """
 Permission utilities for the EquipmentLoan plugin.
 Handles authorization checks for registering and managing equipment loans.
+
+The DRF permission classes live in permissions_drf, so importing these
+helpers does not load rest_framework.
 """
 
-from rest_framework.permissions import BasePermission
+import importlib
+from functools import lru_cache
 
+from .cache import get_cached_setting
 
-def get_allowed_groups_for_loans(plugin):
+
+@lru_cache(maxsize=32)
+def parse_allowed_groups(allowed_groups_setting):
     """
-    Get the list of allowed groups that can register equipment loans.
+    Parse the comma-separated allowed groups setting.
+
+    Cached on the raw setting string, so it is only re-parsed when the setting changes.
 
     Args:
-        plugin: The EquipmentLoan plugin instance
+        allowed_groups_setting: Raw value of the EQUIPMENTLOAN_ALLOWED_GROUPS setting
 
     Returns:
-        list: Group names allowed to register loans, or None if all users allowed
+        frozenset: Group names allowed to register loans, or None if all users allowed
     """
-    allowed_groups_setting = plugin.get_setting("EQUIPMENTLOAN_ALLOWED_GROUPS", "")
-
     if not allowed_groups_setting:
         return None  # No restrictions - all authenticated users allowed
 
-    # Parse comma-separated group names
-    group_names = [
+    group_names = frozenset(
         name.strip() for name in allowed_groups_setting.split(",") if name.strip()
-    ]
+    )
     return group_names if group_names else None
 
 
+def get_allowed_groups_for_loans(plugin):
+    """
+    Get the set of allowed groups that can register equipment loans.
+
+    Args:
+        plugin: The EquipmentLoan plugin instance
+
+    Returns:
+        frozenset: Group names allowed to register loans, or None if all users allowed
+    """
+    return parse_allowed_groups(
+        get_cached_setting(plugin, "EQUIPMENTLOAN_ALLOWED_GROUPS") or ""
+    )
+
+
+def get_user_group_names(user):
+    """
+    Get the names of the groups a user belongs to.
+
+    The result is memoized on the user object, so repeated permission
+    checks within a request only query the database once.
+
+    Args:
+        user: The Django user object
+
+    Returns:
+        frozenset: Names of the user's groups
+    """
+    if not hasattr(user, "_loan_group_names"):
+        user._loan_group_names = frozenset(user.groups.values_list("name", flat=True))
+    return user._loan_group_names
+
+
+def get_request_plugin(request):
+    """
+    Get the EquipmentLoan plugin instance for a request.
+
+    The registry lookup is cached on the request, so it only happens once
+    however many permission checks run.
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        The EquipmentLoan plugin instance, or None if it is not available
+    """
+    if not hasattr(request, "_equipmentloan_plugin"):
+        request._equipmentloan_plugin = request.inventree_plugins.get("equipmentloan")
+    return request._equipmentloan_plugin
+
+
 def user_can_register_loan(user, plugin):
     """
     Check if a user is allowed to register an equipment loan.
@@ -44,7 +101,7 @@ def user_can_register_loan(user, plugin):
         return False
 
     # Check if plugin is enabled
-    if not plugin.get_setting("EQUIPMENTLOAN_LOAN_EQUIPMENT"):
+    if not get_cached_setting(plugin, "EQUIPMENTLOAN_LOAN_EQUIPMENT"):
         return False
 
     # Superusers and staff always allowed (unless restricted by groups)
@@ -59,8 +116,7 @@ def user_can_register_loan(user, plugin):
         return True
 
     # Check if user is in any of the allowed groups
-    user_groups = user.groups.values_list("name", flat=True)
-    return any(group in allowed_groups for group in user_groups)
+    return not allowed_groups.isdisjoint(get_user_group_names(user))
 
 
 def user_can_approve_loan(user, plugin):
@@ -104,43 +160,15 @@ def user_can_manage_loan(user, loan, plugin):
     return loan.borrower == user
 
 
-class CanRegisterLoanPermission(BasePermission):
-    """
-    Custom DRF permission for registering equipment loans.
-    Checks if user is in allowed groups.
-    """
-
-    def has_permission(self, request, view):
-        """Check if user can register a loan"""
-        plugin = request.inventree_plugins.get("equipmentloan")
-        if not plugin:
-            return False
-        return user_can_register_loan(request.user, plugin)
+# DRF permission classes, resolved lazily from permissions_drf (PEP 562)
+_DRF_PERMISSIONS = (
+    "CanRegisterLoanPermission",
+    "CanApproveLoanPermission",
+    "CanManageLoanPermission",
+)
 
 
-class CanApproveLoanPermission(BasePermission):
-    """
-    Custom DRF permission for approving equipment loans.
-    Only staff/admin users allowed.
-    """
-
-    def has_permission(self, request, view):
-        """Check if user can approve loans"""
-        plugin = request.inventree_plugins.get("equipmentloan")
-        if not plugin:
-            return False
-        return user_can_approve_loan(request.user, plugin)
-
-
-class CanManageLoanPermission(BasePermission):
-    """
-    Custom DRF permission for managing a specific loan.
-    Borrowers can manage their own, staff can manage all.
-    """
-
-    def has_object_permission(self, request, view, obj):
-        """Check if user can manage this specific loan"""
-        plugin = request.inventree_plugins.get("equipmentloan")
-        if not plugin:
-            return False
-        return user_can_manage_loan(request.user, obj, plugin)
+def __getattr__(name):
+    if name in _DRF_PERMISSIONS:
+        return getattr(importlib.import_module(".permissions_drf", __package__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,55 @@
+"""
+DRF permission classes for the EquipmentLoan plugin.
+Thin wrappers around the checks in permissions.py.
+"""
+
+from rest_framework.permissions import BasePermission
+
+from .permissions import (
+    get_request_plugin,
+    user_can_approve_loan,
+    user_can_manage_loan,
+    user_can_register_loan,
+)
+
+
+class CanRegisterLoanPermission(BasePermission):
+    """
+    Custom DRF permission for registering equipment loans.
+    Checks if user is in allowed groups.
+    """
+
+    def has_permission(self, request, view):
+        """Check if user can register a loan"""
+        plugin = get_request_plugin(request)
+        if not plugin:
+            return False
+        return user_can_register_loan(request.user, plugin)
+
+
+class CanApproveLoanPermission(BasePermission):
+    """
+    Custom DRF permission for approving equipment loans.
+    Only staff/admin users allowed.
+    """
+
+    def has_permission(self, request, view):
+        """Check if user can approve loans"""
+        plugin = get_request_plugin(request)
+        if not plugin:
+            return False
+        return user_can_approve_loan(request.user, plugin)
+
+
+class CanManageLoanPermission(BasePermission):
+    """
+    Custom DRF permission for managing a specific loan.
+    Borrowers can manage their own, staff can manage all.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        """Check if user can manage this specific loan"""
+        plugin = get_request_plugin(request)
+        if not plugin:
+            return False
+        return user_can_manage_loan(request.user, obj, plugin)
@@ -6,13 +6,39 @@ from rest_framework import serializers
 from .models import EquipmentLoan, LoanHistory
 
 
+def include_history(request):
+    """Check whether the request asked for nested loan history (?include=history)"""
+    if request is None:
+        return False
+    return "history" in request.query_params.get("include", "").split(",")
+
+
+class DurationDaysField(serializers.Field):
+    """Read-only field which renders a timedelta as whole days"""
+
+    def to_representation(self, value):
+        return value.days
+
+
+class LoanListFilterSerializer(serializers.Serializer):
+    """Query parameters accepted by the loan list endpoint"""
+
+    status = serializers.ChoiceField(
+        choices=EquipmentLoan.LOAN_STATUS_CHOICES, required=False, allow_blank=True
+    )
+    borrower_id = serializers.IntegerField(required=False)
+    part_id = serializers.IntegerField(required=False)
+    overdue_only = serializers.BooleanField(required=False)
+    include_count = serializers.BooleanField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=0)
+    offset = serializers.IntegerField(min_value=0, default=0)
+
+
 class LoanHistorySerializer(serializers.ModelSerializer):
     """Serializer for LoanHistory model"""
 
     user_username = serializers.CharField(source="user.username", read_only=True)
-    event_type_display = serializers.CharField(
-        source="get_event_type_display", read_only=True
-    )
+    event_type_display = serializers.SerializerMethodField()
 
     class Meta:
         model = LoanHistory
@@ -27,6 +53,10 @@ class LoanHistorySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "user", "timestamp"]
 
+    def get_event_type_display(self, obj):
+        """Get the display label for the event type"""
+        return LoanHistory.EVENT_TYPE_DISPLAY.get(obj.event_type, obj.event_type)
+
 
 class EquipmentLoanSerializer(serializers.ModelSerializer):
     """Serializer for EquipmentLoan model"""
@@ -41,7 +71,6 @@ class EquipmentLoanSerializer(serializers.ModelSerializer):
     is_overdue = serializers.SerializerMethodField()
     days_borrowed = serializers.SerializerMethodField()
     days_overdue = serializers.SerializerMethodField()
-    history = LoanHistorySerializer(many=True, read_only=True)
 
     class Meta:
         model = EquipmentLoan
@@ -66,43 +95,60 @@ class EquipmentLoanSerializer(serializers.ModelSerializer):
             "is_overdue",
             "days_borrowed",
             "days_overdue",
-            "history",
         ]
         read_only_fields = [
+            "borrower",
             "date_borrowed",
             "date_created",
             "date_updated",
             "created_by",
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Nested history is only included on request, as it can be large
+        if include_history(self.context.get("request")):
+            self.fields["history"] = LoanHistorySerializer(many=True, read_only=True)
+
+    # The view may supply a single "now" timestamp in the serializer context,
+    # so all computed fields (and all rows) are evaluated against the same time
+
     def get_is_overdue(self, obj):
         """Check if loan is overdue"""
-        return obj.is_overdue()
+        return obj.is_overdue(now=self.context.get("now"))
 
     def get_days_borrowed(self, obj):
         """Get number of days borrowed"""
-        return obj.get_days_borrowed()
+        return obj.get_days_borrowed(now=self.context.get("now"))
 
     def get_days_overdue(self, obj):
         """Get number of days overdue"""
-        return obj.get_days_overdue()
+        return obj.get_days_overdue(now=self.context.get("now"))
 
 
 class EquipmentLoanListSerializer(serializers.ModelSerializer):
-    """Simplified serializer for loan list views"""
+    """
+    Simplified serializer for loan list views.
+
+    Expects a queryset annotated with `is_overdue_db` and `days_borrowed_db`
+    (see `views.annotate_loan_metrics`), so no per-row Python work is needed.
+    """
 
     borrower_username = serializers.CharField(
         source="borrower.username", read_only=True
     )
     status_display = serializers.CharField(source="get_status_display", read_only=True)
-    is_overdue = serializers.SerializerMethodField()
-    days_borrowed = serializers.SerializerMethodField()
+    is_overdue = serializers.BooleanField(source="is_overdue_db", read_only=True)
+    days_borrowed = DurationDaysField(source="days_borrowed_db", read_only=True)
 
     class Meta:
         model = EquipmentLoan
         fields = [
             "id",
+            "borrower_id",
             "borrower_username",
+            "part_id",
             "part_name",
             "quantity",
             "date_borrowed",
@@ -114,9 +160,3 @@ class EquipmentLoanListSerializer(serializers.ModelSerializer):
             "days_borrowed",
         ]
         read_only_fields = fields
-
-    def get_is_overdue(self, obj):
-        return obj.is_overdue()
-
-    def get_days_borrowed(self, obj):
-        return obj.get_days_borrowed()
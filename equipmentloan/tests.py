@@ -0,0 +1,287 @@
+"""
+Tests for the EquipmentLoan API.
+Includes query count checks, to guard against N+1 queries in the loan endpoints.
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import EquipmentLoan, LoanHistory
+
+LOANS_URL = "/plugin/equipmentloan/loans/"
+
+
+class LoanQueryCountTest(TestCase):
+    """Check the number of queries run by the loan endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+
+        cls.loans = []
+        for idx in range(5):
+            borrower = User.objects.create_user(f"borrower{idx}")
+            loan = EquipmentLoan.objects.create(
+                borrower=borrower,
+                created_by=borrower,
+                part_id=idx,
+                part_name=f"Part {idx}",
+            )
+            cls.loans.append(loan)
+
+            LoanHistory.objects.bulk_create([
+                LoanHistory(
+                    loan=loan,
+                    event_type="notes_updated",
+                    description=f"Entry {entry}",
+                    user=borrower,
+                )
+                for entry in range(5)
+            ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_list(self):
+        """Listing loans is a single query, regardless of the number of loans"""
+        with self.assertNumQueries(1):
+            response = self.client.get(LOANS_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+
+    def test_retrieve_with_history(self):
+        """History entries and their users are prefetched in one query"""
+        loan = self.loans[0]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{LOANS_URL}{loan.pk}/?include=history")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["history"]), 5)
+
+    def test_partial_update_with_history(self):
+        """Updating a loan reloads its history once, not once per entry"""
+        loan = self.loans[0]
+
+        # Fetch the loan, update it, then prefetch its history
+        with self.assertNumQueries(3):
+            response = self.client.patch(
+                f"{LOANS_URL}{loan.pk}/?include=history",
+                {"notes": "Updated"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["notes"], "Updated")
+        self.assertEqual(len(response.data["history"]), 5)
+
+    def test_mark_returned_with_history(self):
+        """Loan actions write, then load the fresh history with its users"""
+        loan = self.loans[0]
+
+        # Fetch, update and history insert (inside a savepoint), then the prefetch
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                f"{LOANS_URL}{loan.pk}/mark_returned/?include=history"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "returned")
+        self.assertEqual(len(response.data["history"]), 6)
+
+
+class LoanBulkCreateTest(TestCase):
+    """Tests for the bulk_create loan action"""
+
+    URL = f"{LOANS_URL}bulk_create/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("importer", is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_loans(self, count, url=None):
+        """Post a list of new loans"""
+        return self.client.post(
+            url or self.URL,
+            [{"part_id": idx, "part_name": f"Part {idx}"} for idx in range(count)],
+            format="json",
+        )
+
+    def assert_created(self, response, count):
+        """Check that the loans were created with their history entries"""
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), count)
+
+        loans = EquipmentLoan.objects.filter(borrower=self.user)
+        self.assertEqual(loans.count(), count)
+        self.assertEqual(
+            LoanHistory.objects.filter(loan__in=loans, event_type="created").count(),
+            count,
+        )
+
+    def test_bulk_create(self):
+        """Loans and their history entries are created for the current user"""
+        self.assert_created(self.post_loans(3), 3)
+
+    def test_bulk_create_without_returned_ids(self):
+        """Databases which do not return bulk insert ids save the loans one by one"""
+        with mock.patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", False
+        ):
+            self.assert_created(self.post_loans(3), 3)
+
+    def test_bulk_create_with_history(self):
+        """Requested history is prefetched in one query for all loans"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_loans(3, url=f"{self.URL}?include=history")
+
+        self.assert_created(response, 3)
+        self.assertTrue(all(len(loan["history"]) == 1 for loan in response.data))
+
+        history_selects = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and "loanhistory" in query["sql"]
+        ]
+        self.assertEqual(len(history_selects), 1)
+
+    def test_bulk_create_invalid(self):
+        """Bad bodies are rejected without creating anything"""
+        for body in ({"part_id": 1, "part_name": "Part"}, [], [{"part_id": 1}]):
+            response = self.client.post(self.URL, body, format="json")
+            self.assertEqual(response.status_code, 400)
+
+        self.assertFalse(EquipmentLoan.objects.exists())
+
+
+class LoanBulkReturnTest(TestCase):
+    """Tests for the bulk_return loan action"""
+
+    URL = f"{LOANS_URL}bulk_return/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("borrower")
+        cls.other = User.objects.create_user("other")
+
+        cls.own_loan = EquipmentLoan.objects.create(
+            borrower=cls.user, part_id=1, part_name="Own"
+        )
+        cls.returned_loan = EquipmentLoan.objects.create(
+            borrower=cls.user, part_id=2, part_name="Returned", status="returned"
+        )
+        cls.other_loan = EquipmentLoan.objects.create(
+            borrower=cls.other, part_id=3, part_name="Other"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_return(self):
+        """Only the user's own outstanding loans are returned"""
+        loan_ids = [self.own_loan.pk, self.returned_loan.pk, self.other_loan.pk]
+        response = self.client.post(
+            self.URL, {"loans": loan_ids, "return_notes": "Fine"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["returned"], [self.own_loan.pk])
+
+        self.own_loan.refresh_from_db()
+        self.assertEqual(self.own_loan.status, "returned")
+        self.assertEqual(self.own_loan.return_notes, "Fine")
+        self.assertIsNotNone(self.own_loan.date_returned)
+
+        self.other_loan.refresh_from_db()
+        self.assertEqual(self.other_loan.status, "active")
+
+        # Only the newly returned loan gets a history entry
+        self.assertEqual(
+            list(LoanHistory.objects.values_list("loan_id", flat=True)),
+            [self.own_loan.pk],
+        )
+
+    def test_null_return_notes(self):
+        """Null return notes are stored as empty"""
+        response = self.client.post(
+            self.URL,
+            {"loans": [self.own_loan.pk], "return_notes": None},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.own_loan.refresh_from_db()
+        self.assertEqual(self.own_loan.return_notes, "")
+
+    def test_invalid_body(self):
+        """Bad bodies are rejected without changing any loan"""
+        for body in (
+            [self.own_loan.pk],
+            {},
+            {"loans": []},
+            {"loans": [True]},
+            {"loans": ["1"]},
+            {"loans": [self.own_loan.pk], "return_notes": 5},
+        ):
+            response = self.client.post(self.URL, body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+
+        self.own_loan.refresh_from_db()
+        self.assertEqual(self.own_loan.status, "active")
+
+
+class LoanExtendDueDateTest(TestCase):
+    """Tests for the extend_due_date loan action"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("borrower")
+        cls.loan = EquipmentLoan.objects.create(
+            borrower=cls.user, part_id=1, part_name="Part"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"{LOANS_URL}{self.loan.pk}/extend_due_date/"
+
+    def test_extend(self):
+        """The compact response renders dates like the full loan serializer"""
+        response = self.client.post(
+            self.url, {"date_due": "2030-01-02T03:04:05Z"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        detail = self.client.get(f"{LOANS_URL}{self.loan.pk}/")
+        self.assertEqual(response.data["date_due"], detail.data["date_due"])
+        self.assertIsNone(response.data["date_returned"])
+
+    def test_extend_verbose(self):
+        """The full loan can be returned after extending"""
+        response = self.client.post(
+            f"{self.url}?verbose=1", {"date_due": "2030-01-02T03:04:05Z"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["is_overdue"])
+
+    def test_extend_invalid(self):
+        """Missing or unparseable dates are rejected"""
+        for body in ({}, {"date_due": "next week"}):
+            response = self.client.post(self.url, body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+
+        self.loan.refresh_from_db()
+        self.assertIsNone(self.loan.date_due)
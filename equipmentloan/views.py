@@ -1,38 +1,162 @@
+import datetime
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import status, viewsets
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    BooleanField,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Prefetch,
+    Q,
+    prefetch_related_objects,
+)
+from django.db.models.functions import Coalesce, Now
 from django.utils import timezone
-from .models import EquipmentLoan, LoanHistory
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+from . import PLUGIN_VERSION
+from .cache import (
+    PAGE_CACHE_TIMEOUT,
+    cached_json,
+    get_cached_settings,
+    invalidate_loan_cache,
+)
+from .models import EquipmentLoan, EquipmentLoanQuerySet, LoanHistory
 from .serializers import (
     EquipmentLoanSerializer,
     EquipmentLoanListSerializer,
+    LoanListFilterSerializer,
+    include_history,
 )
 from .permissions import (
+    get_request_plugin,
     user_can_register_loan,
 )
 from django.views.generic import TemplateView
 
 
+# Columns read by EquipmentLoanListSerializer
+LOAN_LIST_FIELDS = (
+    "id",
+    "borrower__username",
+    "part_id",
+    "part_name",
+    "quantity",
+    "date_borrowed",
+    "date_due",
+    "date_returned",
+    "status",
+)
+
+
+# Renders and parses datetimes as the serializers do (active timezone, API format)
+DATETIME_FIELD = serializers.DateTimeField()
+LIST_DATETIME_COLUMNS = ("date_borrowed", "date_due", "date_returned")
+
+
+def annotate_loan_metrics(queryset):
+    """Annotate overdue state and days borrowed in SQL, for EquipmentLoanListSerializer"""
+    return queryset.annotate(
+        is_overdue_db=ExpressionWrapper(
+            Q(date_returned__isnull=True)
+            & ~Q(status="returned")
+            # Checked explicitly, so a missing due date gives False instead of NULL
+            & Q(date_due__isnull=False)
+            & Q(date_due__lt=Now()),
+            output_field=BooleanField(),
+        ),
+        days_borrowed_db=ExpressionWrapper(
+            Coalesce("date_returned", Now()) - F("date_borrowed"),
+            output_field=DurationField(),
+        ),
+    )
+
+
+def get_loan_list_rows(queryset):
+    """
+    Fetch loan list rows as plain dicts, in the EquipmentLoanListSerializer format.
+
+    Skips model instantiation and serializer field dispatch for every row.
+    Expects a queryset prepared with annotate_loan_metrics().
+    """
+    rows = list(
+        queryset.values(
+            "id",
+            "borrower_id",
+            "part_id",
+            "part_name",
+            "quantity",
+            "date_borrowed",
+            "date_due",
+            "date_returned",
+            "status",
+            "is_overdue_db",
+            "days_borrowed_db",
+            borrower_username=F("borrower__username"),
+        )
+    )
+
+    to_datetime = DATETIME_FIELD.to_representation
+    for row in rows:
+        for field in LIST_DATETIME_COLUMNS:
+            row[field] = to_datetime(row[field])
+        row["status_display"] = EquipmentLoan.STATUS_DISPLAY.get(
+            row["status"], row["status"]
+        )
+        row["is_overdue"] = row.pop("is_overdue_db")
+        row["days_borrowed"] = row.pop("days_borrowed_db").days
+
+    return rows
+
+
+def get_created_history(loan, user):
+    """Build the history entry recording that a loan was created"""
+    return LoanHistory(
+        loan=loan,
+        event_type="created",
+        description=f"Equipment loan created: {loan.part_name} (qty: {loan.quantity})",
+        user=user,
+    )
+
+
+def get_history_prefetch():
+    """Prefetch for loan history, including the users LoanHistorySerializer reads"""
+    return Prefetch("history", queryset=LoanHistory.objects.select_related("user"))
+
+
+def get_loan_list_queryset():
+    """Return the base queryset for loan list endpoints"""
+    return annotate_loan_metrics(
+        EquipmentLoan.objects.select_related("borrower").only(*LOAN_LIST_FIELDS)
+    )
+
+
 class MyPluginSettingsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # Settings exposed to the frontend
+    SETTING_KEYS = (
+        "CUSTOM_VALUE",
+        "EQUIPMENTLOAN_LOAN_EQUIPMENT",
+        "EQUIPMENTLOAN_ALLOWED_GROUPS",
+        "EQUIPMENTLOAN_REQUIRE_ADMIN_APPROVAL",
+    )
+
     def get(self, request):
-        plugin = request.inventree_plugins.get("equipmentloan")
+        plugin = get_request_plugin(request)
 
-        return Response({
-            "CUSTOM_VALUE": plugin.get_setting("CUSTOM_VALUE"),
-            "EQUIPMENTLOAN_LOAN_EQUIPMENT": plugin.get_setting(
-                "EQUIPMENTLOAN_LOAN_EQUIPMENT"
-            ),
-            "EQUIPMENTLOAN_ALLOWED_GROUPS": plugin.get_setting(
-                "EQUIPMENTLOAN_ALLOWED_GROUPS"
-            ),
-            "EQUIPMENTLOAN_REQUIRE_ADMIN_APPROVAL": plugin.get_setting(
-                "EQUIPMENTLOAN_REQUIRE_ADMIN_APPROVAL"
-            ),
-        })
+        return Response(get_cached_settings(plugin, self.SETTING_KEYS))
 
 
 class EquipmentLoanViewSet(viewsets.ModelViewSet):
@@ -50,119 +174,296 @@ class EquipmentLoanViewSet(viewsets.ModelViewSet):
             return EquipmentLoanListSerializer
         return EquipmentLoanSerializer
 
+    def get_serializer_context(self):
+        """Provide a single timestamp for the serializer's computed fields"""
+        context = super().get_serializer_context()
+        context["now"] = timezone.now()
+        return context
+
     def get_queryset(self):
         """Filter loans based on user permissions"""
-        queryset = EquipmentLoan.objects.all()
+        if self.action == "list":
+            queryset = get_loan_list_queryset()
+        else:
+            queryset = EquipmentLoan.objects.select_related("borrower", "created_by")
+
+            # Views which write load the history after saving instead (see
+            # perform_update and get_loan_response), so it is never stale
+            if self.action == "retrieve" and include_history(self.request):
+                queryset = queryset.prefetch_related(get_history_prefetch())
 
         # Staff can see all loans
-        if self.request.user.is_staff:
+        user = self.request.user
+        if user.is_staff:
             return queryset
 
         # Regular users only see their own loans
-        return queryset.filter(borrower=self.request.user)
+        return queryset.filter(borrower=user)
+
+    def check_can_register(self, request):
+        """Return a 403 response if the user may not register loans, else None"""
+        if user_can_register_loan(request.user, get_request_plugin(request)):
+            return None
+
+        return Response(
+            {"error": "You do not have permission to register equipment loans."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
 
     def create(self, request, *args, **kwargs):
         """Create a new equipment loan"""
-        plugin = request.inventree_plugins.get("equipmentloan")
+        user = request.user
 
-        # Check if user can register loans
-        if not user_can_register_loan(request.user, plugin):
-            return Response(
-                {"error": "You do not have permission to register equipment loans."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
+        denied = self.check_can_register(request)
+        if denied:
+            return denied
 
         # Validate required fields
-        if "part_id" not in request.data or "part_name" not in request.data:
+        data = request.data
+        if "part_id" not in data or "part_name" not in data:
             return Response(
                 {"error": "part_id and part_name are required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Set the borrower to current user if not specified
-        request.data["borrower"] = request.user.id
-        request.data["created_by"] = request.user.id
-
-        serializer = self.get_serializer(data=request.data)
+        serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
-
-        # Create history entry
-        loan = serializer.instance
-        LoanHistory.objects.create(
-            loan=loan,
-            event_type="created",
-            description=f"Equipment loan created: {loan.part_name} (qty: {loan.quantity})",
-            user=request.user,
-        )
+
+        # Save the loan and its history entry in one transaction
+        with transaction.atomic():
+            # The loan is always registered to the current user
+            serializer.save(borrower=user, created_by=user)
+
+            get_created_history(serializer.instance, user).save()
 
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
         )
 
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request):
+        """Create several equipment loans in one request, e.g. when importing a shipment"""
+        user = request.user
+
+        denied = self.check_can_register(request)
+        if denied:
+            return denied
+
+        data = request.data
+        if not isinstance(data, list) or not data:
+            return Response(
+                {"error": "Expected a non-empty list of loans"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        loans = [
+            EquipmentLoan(**values, borrower=user, created_by=user)
+            for values in serializer.validated_data
+        ]
+
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                # One batched INSERT, which sets the primary keys of the loans
+                EquipmentLoan.objects.bulk_create(loans, batch_size=500)
+            else:
+                # Without returned primary keys (e.g. MySQL) the history rows
+                # could not reference the loans, so save them one by one
+                for loan in loans:
+                    loan.save()
+
+            LoanHistory.objects.bulk_create(
+                [get_created_history(loan, user) for loan in loans],
+                batch_size=500,
+            )
+
+        # bulk_create() does not send post_save, so invalidate cached statistics here
+        invalidate_loan_cache()
+
+        if include_history(request):
+            prefetch_related_objects(loans, get_history_prefetch())
+
+        return Response(
+            self.get_serializer(loans, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get_loan_response(self, loan):
+        """
+        Build the response for a loan action.
+
+        Returns a compact summary of the changed fields, unless the client asks
+        for the full loan with ?verbose=1 (or ?include=history).
+        """
+        if include_history(self.request):
+            prefetch_related_objects([loan], get_history_prefetch())
+        elif self.request.query_params.get("verbose") not in ("1", "true"):
+            return Response({
+                "id": loan.pk,
+                "status": loan.status,
+                "date_due": DATETIME_FIELD.to_representation(loan.date_due),
+                "date_returned": DATETIME_FIELD.to_representation(loan.date_returned),
+            })
+
+        serializer = self.get_serializer(loan)
+        return Response(serializer.data)
+
+    def update(self, request, *args, **kwargs):
+        """
+        Update a loan.
+
+        Same as UpdateModelMixin.update(), except that the prefetch cache is kept,
+        as perform_update() loads the history after saving.
+        """
+        partial = kwargs.pop("partial", False)
+        serializer = self.get_serializer(
+            self.get_object(), data=request.data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        return Response(serializer.data)
+
     def perform_update(self, serializer):
         """Update a loan"""
-        serializer.save()
+        loan = serializer.save()
+
+        # Load the history with its users, rather than one query per entry
+        if include_history(self.request):
+            prefetch_related_objects([loan], get_history_prefetch())
 
     @action(detail=True, methods=["post"])
     def mark_returned(self, request, pk=None):
         """Mark equipment as returned"""
         loan = self.get_object()
+        user = request.user
 
         # Check permissions
-        if not request.user.is_staff and loan.borrower != request.user:
+        if not user.is_staff and loan.borrower_id != user.pk:
             return Response(
                 {"error": "You do not have permission to manage this loan."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
         return_notes = request.data.get("return_notes", "")
-        loan.mark_returned(return_notes=return_notes)
-
-        # Create history entry
-        LoanHistory.objects.create(
-            loan=loan,
-            event_type="returned",
-            description=f"Equipment returned: {loan.part_name}",
-            user=request.user,
+        with transaction.atomic():
+            loan.mark_returned(return_notes=return_notes)
+
+            # Create history entry
+            LoanHistory.objects.create(
+                loan=loan,
+                event_type="returned",
+                description=f"Equipment returned: {loan.part_name}",
+                user=user,
+            )
+
+        return self.get_loan_response(loan)
+
+    @action(detail=False, methods=["post"])
+    def bulk_return(self, request):
+        """Mark several loans as returned in one request"""
+        data = request.data
+        loan_ids = data.get("loans") if isinstance(data, Mapping) else None
+        if (
+            not isinstance(loan_ids, list)
+            or not loan_ids
+            or not all(
+                isinstance(loan_id, int) and not isinstance(loan_id, bool)
+                for loan_id in loan_ids
+            )
+        ):
+            return Response(
+                {"error": "loans must be a non-empty list of loan IDs"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return_notes = data.get("return_notes") or ""
+        if not isinstance(return_notes, str):
+            return Response(
+                {"error": "return_notes must be a string"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = request.user
+
+        # get_queryset() limits regular users to their own loans
+        queryset = (
+            self.get_queryset().filter(pk__in=loan_ids).exclude(status="returned")
         )
 
-        serializer = self.get_serializer(loan)
-        return Response(serializer.data)
+        with transaction.atomic():
+            loans = list(
+                queryset
+                .select_related(None)
+                .select_for_update()
+                .only("id", "part_name")
+            )
+            returned_ids = [loan.pk for loan in loans]
+
+            # Same clock as EquipmentLoan.mark_returned()
+            now = timezone.now()
+            EquipmentLoan.objects.filter(pk__in=returned_ids).update(
+                status="returned",
+                date_returned=now,
+                return_notes=return_notes,
+                date_updated=now,
+            )
+
+            LoanHistory.objects.bulk_create(
+                [
+                    LoanHistory(
+                        loan=loan,
+                        event_type="returned",
+                        description=f"Equipment returned: {loan.part_name}",
+                        user=user,
+                    )
+                    for loan in loans
+                ],
+                batch_size=500,
+            )
+
+        # update() does not send post_save, so invalidate cached statistics here
+        invalidate_loan_cache()
+
+        return Response({"returned": returned_ids})
 
     @action(detail=True, methods=["post"])
     def mark_lost(self, request, pk=None):
         """Mark equipment as lost"""
         loan = self.get_object()
+        user = request.user
 
         # Check permissions
-        if not request.user.is_staff:
+        if not user.is_staff:
             return Response(
                 {"error": "Only staff can mark equipment as lost."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        loan.mark_lost()
+        with transaction.atomic():
+            loan.mark_lost()
 
-        # Create history entry
-        LoanHistory.objects.create(
-            loan=loan,
-            event_type="marked_lost",
-            description=f"Equipment marked as lost: {loan.part_name}",
-            user=request.user,
-        )
+            # Create history entry
+            LoanHistory.objects.create(
+                loan=loan,
+                event_type="marked_lost",
+                description=f"Equipment marked as lost: {loan.part_name}",
+                user=user,
+            )
 
-        serializer = self.get_serializer(loan)
-        return Response(serializer.data)
+        return self.get_loan_response(loan)
 
     @action(detail=True, methods=["post"])
     def extend_due_date(self, request, pk=None):
         """Extend the due date of a loan"""
         loan = self.get_object()
+        user = request.user
 
         # Check permissions
-        if not request.user.is_staff and loan.borrower != request.user:
+        if not user.is_staff and loan.borrower_id != user.pk:
             return Response(
                 {"error": "You do not have permission to manage this loan."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -174,63 +475,90 @@ class EquipmentLoanViewSet(viewsets.ModelViewSet):
                 {"error": "date_due is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        try:
+            new_due_date = DATETIME_FIELD.to_internal_value(new_due_date)
+        except serializers.ValidationError as exc:
+            return Response(
+                {"error": f"date_due: {' '.join(exc.detail)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         old_due_date = loan.date_due
         loan.date_due = new_due_date
-        loan.save()
-
-        # Create history entry
-        LoanHistory.objects.create(
-            loan=loan,
-            event_type="extended",
-            description=f"Due date extended from {old_due_date} to {new_due_date}",
-            user=request.user,
-        )
 
-        serializer = self.get_serializer(loan)
-        return Response(serializer.data)
+        with transaction.atomic():
+            loan.save()
+
+            # Create history entry
+            LoanHistory.objects.create(
+                loan=loan,
+                event_type="extended",
+                description=f"Due date extended from {old_due_date} to {new_due_date}",
+                user=user,
+            )
+
+        return self.get_loan_response(loan)
 
 
 class LoanListView(APIView):
     """
     API endpoint for listing all equipment loans with filtering.
+
+    Supports optional `limit` / `offset` pagination, applied in SQL.
+    `count` is the number of results returned; pass `include_count=true`
+    to get the total number of matching loans instead (one extra query,
+    skipped when no `limit` or `offset` is given).
+    Invalid parameters (see LoanListFilterSerializer) are rejected with a 400.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """Get filtered list of loans"""
-        queryset = EquipmentLoan.objects.all()
+        # Reject malformed parameters before building any query
+        filters = LoanListFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        queryset = get_loan_list_queryset()
 
         # Staff can see all loans
-        if not request.user.is_staff:
-            queryset = queryset.filter(borrower=request.user)
+        user = request.user
+        is_staff = user.is_staff
+        if not is_staff:
+            queryset = queryset.filter(borrower=user)
 
         # Filter by status
-        status_filter = request.query_params.get("status")
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        if params.get("status"):
+            queryset = queryset.filter(status=params["status"])
 
         # Filter by borrower (staff only)
-        if request.user.is_staff:
-            borrower_id = request.query_params.get("borrower_id")
-            if borrower_id:
-                queryset = queryset.filter(borrower_id=borrower_id)
+        if is_staff and "borrower_id" in params:
+            queryset = queryset.filter(borrower_id=params["borrower_id"])
 
         # Filter by part
-        part_id = request.query_params.get("part_id")
-        if part_id:
-            queryset = queryset.filter(part_id=part_id)
+        if "part_id" in params:
+            queryset = queryset.filter(part_id=params["part_id"])
 
         # Filter overdue loans
-        show_overdue = request.query_params.get("overdue_only")
-        if show_overdue == "true":
-            queryset = queryset.filter(status="active", date_due__lt=timezone.now())
+        if params.get("overdue_only"):
+            queryset = queryset.overdue()
 
         # Order by date
         queryset = queryset.order_by("-date_borrowed")
 
-        serializer = EquipmentLoanListSerializer(queryset, many=True)
-        return Response({"count": queryset.count(), "results": serializer.data})
+        offset = params["offset"]
+        limit = params.get("limit")
+        end = offset + limit if limit is not None else None
+        results = get_loan_list_rows(queryset[offset:end])
+
+        # An unsliced page is the full result set, so no COUNT is needed for it
+        if params.get("include_count") and (offset or limit is not None):
+            count = queryset.count()
+        else:
+            count = len(results)
+
+        return Response({"count": count, "results": results})
 
 
 class LoanStatisticsView(APIView):
@@ -242,27 +570,75 @@ class LoanStatisticsView(APIView):
 
     def get(self, request):
         """Get loan statistics"""
+        return Response(
+            cached_json("stats", request, lambda: self.compute_statistics(request))
+        )
+
+    def compute_statistics(self, request):
+        """Compute the loan statistics visible to the requesting user"""
         queryset = EquipmentLoan.objects.all()
 
         # Regular users only see their own statistics
-        if not request.user.is_staff:
-            queryset = queryset.filter(borrower=request.user)
+        user = request.user
+        if not user.is_staff:
+            queryset = queryset.filter(borrower=user)
+
+        # Compute all statistics in a single query
+        stats = queryset.aggregate(
+            total_loans=Count("id"),
+            active_loans=Count("id", filter=Q(status="active")),
+            returned_loans=Count("id", filter=Q(status="returned")),
+            lost_loans=Count("id", filter=Q(status="lost")),
+            overdue_loans=Count("id", filter=EquipmentLoanQuerySet.OVERDUE),
+            average_borrowed=Avg(
+                ExpressionWrapper(
+                    Coalesce("date_returned", Now()) - F("date_borrowed"),
+                    output_field=DurationField(),
+                )
+            ),
+        )
+
+        average_borrowed = stats.pop("average_borrowed")
+        stats["average_days_borrowed"] = (
+            average_borrowed.days if average_borrowed is not None else 0
+        )
+
+        return stats
 
-        stats = {
-            "total_loans": queryset.count(),
-            "active_loans": queryset.filter(status="active").count(),
-            "returned_loans": queryset.filter(status="returned").count(),
-            "lost_loans": queryset.filter(status="lost").count(),
-            "overdue_loans": queryset.filter(
-                status="active", date_due__isnull=False, date_due__lt=timezone.now()
-            ).count(),
-        }
 
-        return Response(stats)
+# Compiled frontend bundle mounted by LoanManagementPageView
+LOAN_MANAGEMENT_BUNDLE = Path(__file__).parent / "static" / "LoanManagement.js"
 
 
+@lru_cache(maxsize=1)
+def get_bundle_last_modified():
+    """Return when the frontend bundle was built, or None if it is missing"""
+    try:
+        mtime = LOAN_MANAGEMENT_BUNDLE.stat().st_mtime
+    except OSError:
+        return None
+    return datetime.datetime.fromtimestamp(mtime, tz=datetime.timezone.utc)
+
+
+@method_decorator(
+    [
+        condition(
+            last_modified_func=lambda request, *args, **kwargs: (
+                get_bundle_last_modified()
+            )
+        ),
+        # Versioned, so an upgraded plugin does not serve the old page
+        cache_page(PAGE_CACHE_TIMEOUT, key_prefix=f"equipmentloan:{PLUGIN_VERSION}"),
+    ],
+    name="dispatch",
+)
 class LoanManagementPageView(TemplateView):
-    """Render a simple page that mounts the compiled frontend bundle for loan management."""
+    """
+    Render a simple page that mounts the compiled frontend bundle for loan management.
+
+    The page has no per-user content, so it is cached, and carries the bundle's
+    build time as Last-Modified for conditional GETs.
+    """
 
     template_name = "equipmentloan/management.html"
 
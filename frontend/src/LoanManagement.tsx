@@ -218,12 +218,15 @@ function EquipmentLoanManagement({
   // Fetch loan details
   const fetchLoanDetails = useCallback(async (loanId: number) => {
     try {
-      const response = await fetch(`${baseUrl}/loans/${loanId}/`, {
-        headers: {
-          'Content-Type': 'application/json'
-        },
-        credentials: 'include'
-      });
+      const response = await fetch(
+        `${baseUrl}/loans/${loanId}/?include=history`,
+        {
+          headers: {
+            'Content-Type': 'application/json'
+          },
+          credentials: 'include'
+        }
+      );
 
       if (response.ok) {
         const data = await response.json();